@@ -1,15 +1,47 @@
-from flask import Flask
-app = Flask(__name__)
+import asyncio
+import os
+from typing import Optional
+from aiohttp import web
 
-@app.route('/')
-def hello_world():
-    app.logger.debug("Root endpoint called")
-    return 'Free Storage Server Working'
+routes = web.RouteTableDef()
 
-@app.route('/health')
-def health():
-    app.logger.debug("Health check endpoint called")
-    return 'OK', 200
+# The bot's connected Telethon client, for handlers that need Telegram
+TELEGRAM_CLIENT = web.AppKey("telegram_client")
+
+@routes.get('/')
+async def hello_world(request):
+    return web.Response(text='Free Storage Server Working')
+
+@routes.get('/health')
+async def health(request):
+    return web.Response(text='OK')
+
+app = web.Application()
+app.add_routes(routes)
+
+async def serve(host: str = '0.0.0.0', port: Optional[int] = None, telegram_client=None,
+                ready: Optional[asyncio.Event] = None):
+    """Serve the app on the running event loop until cancelled
+    
+    The port defaults to the PORT environment variable set by the hosting
+    platform, or 5000. Passing the bot's ``telegram_client`` shares its
+    MTProto connection with handlers instead of opening a second one.
+    ``ready`` is set once the server is listening.
+    """
+    if port is None:
+        port = int(os.getenv('PORT', 5000))
+    if telegram_client is not None:
+        app[TELEGRAM_CLIENT] = telegram_client
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        if ready is not None:
+            ready.set()
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
 
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=5000)
+    web.run_app(app, host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
@@ -2,43 +2,116 @@ import asyncio
 import logging
 import os
 import tempfile
-from datetime import datetime
-from typing import Optional, BinaryIO
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional, BinaryIO, Tuple
+from urllib.parse import SplitResult, urlsplit
 import aiohttp
 from telethon import TelegramClient, events
 from telethon.tl.types import DocumentAttributeFilename
 from dotenv import load_dotenv
+from config import BotConfig
 from github_uploader import GitHubUploader
 import time
 
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+class RangeNotSupported(Exception):
+    """Raised when a server answers a ranged request with the whole file"""
+
+async def iter_queue(chunks: asyncio.Queue) -> AsyncIterator[bytes]:
+    """Yield chunks from a queue filled by a download until it is complete"""
+    while True:
+        chunk = await chunks.get()
+        if chunk is None:
+            return
+        if isinstance(chunk, Exception):
+            raise chunk
+        yield chunk
+
+async def iter_file(fileobj: BinaryIO, chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    """Yield a downloaded file in chunks from the beginning
+    
+    Reads run in the default executor so a file that has spilled to disk
+    does not block the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    fileobj.seek(0)
+    while chunk := await loop.run_in_executor(None, fileobj.read, chunk_size):
+        yield chunk
+
+class ProgressReporter:
+    """Throttled progress updates on a Telegram message
+    
+    An edit is only sent once the transfer has moved at least 5% (and at
+    least 4MB) and 2 seconds have passed since the previous one. Edits run
+    in the background so the transfer never waits on Telegram; updates that
+    arrive while an edit is still in flight are dropped.
+    """
+    __slots__ = ('progress_msg', 'render', 'step', 'interval', 'last_edited_bytes', 'next_edit_deadline', 'pending')
+    
+    def __init__(self, progress_msg, render: Callable[[int], str], total_size: int, interval: float = 2.0):
+        self.progress_msg = progress_msg
+        self.render = render
+        self.step = max(total_size // 20, 4 * 1024 * 1024)
+        self.interval = interval
+        self.last_edited_bytes = 0
+        self.next_edit_deadline = time.monotonic() + interval
+        self.pending: Optional[asyncio.Task] = None
+    
+    def update(self, current: int) -> None:
+        """Record progress, editing the message if an update is due"""
+        if current - self.last_edited_bytes < self.step:
+            return
+        current_time = time.monotonic()
+        if current_time < self.next_edit_deadline:
+            return
+        if self.pending and not self.pending.done():
+            return
+        
+        self.last_edited_bytes = current
+        self.next_edit_deadline = current_time + self.interval
+        self.pending = asyncio.create_task(self._edit(self.render(current)))
+    
+    async def _edit(self, text: str) -> None:
+        try:
+            await self.progress_msg.edit(text)
+        except Exception as e:
+            logger.warning("Failed to update progress: %s", e)
+    
+    async def close(self) -> None:
+        """Wait for an in-flight edit so it cannot overwrite the next message"""
+        if self.pending:
+            await self.pending
+
 class TelegramBot:
-    def __init__(self):
-        self.api_id = int(os.getenv('TELEGRAM_API_ID'))
-        self.api_hash = os.getenv('TELEGRAM_API_HASH')
-        self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-        self.github_token = os.getenv('GITHUB_TOKEN')
-        self.github_repo = os.getenv('GITHUB_REPO')
-        self.github_release_tag = os.getenv('GITHUB_RELEASE_TAG')
+    # Every possible 20-step progress bar, and the units for format_size
+    _BARS = tuple('█' * i + '░' * (20 - i) for i in range(21))
+    _UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+    def __init__(self, config: Optional[BotConfig] = None):
+        # Reuse the caller's validated config instead of parsing the environment again
+        if config is None:
+            config = BotConfig.from_env()
+            config.validate()
         
-        if not all([self.api_id, self.api_hash, self.bot_token, self.github_token, self.github_repo, self.github_release_tag]):
-            raise ValueError("Missing required environment variables")
+        self.api_id = config.telegram_api_id
+        self.api_hash = config.telegram_api_hash
+        self.bot_token = config.telegram_bot_token
+        self.github_token = config.github_token
+        self.github_repo = config.github_repo
+        self.github_release_tag = config.github_release_tag
         
         self.client = TelegramClient('bot', self.api_id, self.api_hash)
         self.github_uploader = GitHubUploader(self.github_token, self.github_repo, self.github_release_tag)
         self.active_uploads = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Limit how many uploads run at once across all users
+        self._upload_sem = asyncio.Semaphore(config.max_concurrent_uploads)
+        self._handler_tasks = set()
 
     async def start(self):
         """Start the bot"""
@@ -46,7 +119,7 @@ class TelegramBot:
             await self.client.start(bot_token=self.bot_token)
             logger.info("Bot started successfully")
         except Exception as e:
-            logger.error(f"Failed to start bot: {e}")
+            logger.error("Failed to start bot: %s", e)
             raise
         
         @self.client.on(events.NewMessage(pattern='/start'))
@@ -101,6 +174,9 @@ class TelegramBot:
                 await event.respond("⚠️ You have an active upload. Please wait for it to complete.")
                 return
 
+            # Track the handler so stop() can cancel in-flight uploads
+            task = asyncio.current_task()
+            self._handler_tasks.add(task)
             try:
                 # Handle file uploads
                 if event.message.document:
@@ -110,8 +186,9 @@ class TelegramBot:
                 # Handle URL messages
                 if event.message.text:
                     text = event.message.text.strip()
-                    if self.is_url(text):
-                        await self.handle_url_upload(event)
+                    parsed_url = self.parse_url(text)
+                    if parsed_url:
+                        await self.handle_url_upload(event, parsed_url)
                         return
                     
                     # Only respond to non-empty text that's not a URL or command
@@ -127,23 +204,75 @@ class TelegramBot:
                 # Ignore other message types (stickers, photos without documents, etc.)
                 
             except Exception as e:
-                logger.error(f"Error handling message from user {user_id}: {e}")
+                logger.error("Error handling message from user %s: %s", user_id, e)
                 await event.respond(f"❌ **Error**\n\nSomething went wrong: {str(e)}")
                 if user_id in self.active_uploads:
                     del self.active_uploads[user_id]
+            finally:
+                self._handler_tasks.discard(task)
 
         try:
             await self.client.run_until_disconnected()
         except KeyboardInterrupt:
             logger.info("Bot stopped by user")
         except Exception as e:
-            logger.error(f"Bot disconnected with error: {e}")
+            logger.error("Bot disconnected with error: %s", e)
+        finally:
+            await self.close()
+
+    async def stop(self):
+        """Cancel in-flight uploads, then disconnect from Telegram
+        
+        start() returns once the client has disconnected.
+        """
+        tasks = list(self._handler_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.client.disconnect()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session for URL downloads, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=60),
+                # Large downloads can take longer than aiohttp's default 300s total
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the HTTP sessions used for downloads and uploads"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        await self.github_uploader.close()
+
+    @asynccontextmanager
+    async def upload_slot(self, user_id: int, progress_msg, start_text: str):
+        """Hold an upload slot, telling the user while they wait for one"""
+        queued = self._upload_sem.locked()
+        if queued:
+            self.active_uploads[user_id]['status'] = 'Queued'
+            await progress_msg.edit("⏳ **Queued**\n\nWaiting for other uploads to finish...")
+        
+        async with self._upload_sem:
+            if queued:
+                self.active_uploads[user_id]['status'] = 'Starting download...'
+                await progress_msg.edit(start_text)
+            yield
 
-    def is_url(self, text: str) -> bool:
-        """Check if text is a valid URL"""
+    def parse_url(self, text: str) -> Optional[SplitResult]:
+        """Parse text as an HTTP(S) URL, returning None if it is not one"""
         if not text:
-            return False
-        return text.startswith(('http://', 'https://')) and len(text) > 8
+            return None
+        try:
+            parsed_url = urlsplit(text)
+        except ValueError:
+            return None
+        if parsed_url.scheme not in ('http', 'https') or not parsed_url.netloc:
+            return None
+        return parsed_url
 
     async def handle_file_upload(self, event):
         """Handle file upload from Telegram"""
@@ -158,7 +287,7 @@ class TelegramBot:
                 break
         
         file_size = document.size
-        logger.info(f"Receiving file: {filename}, size: {file_size} bytes")
+        logger.info("Receiving file: %s, size: %s bytes", filename, file_size)
         
         # Check file size (4GB limit)
         if file_size > 4 * 1024 * 1024 * 1024:
@@ -170,15 +299,21 @@ class TelegramBot:
             'status': 'Starting download...'
         }
 
-        progress_msg = await event.respond("📥 **Downloading from Telegram...**\n⏳ Starting...")
+        start_text = "📤 **Uploading to GitHub...**\n⏳ Starting..."
+        progress_msg = await event.respond(start_text)
         
         try:
-            # Download file with progress
-            file_data = await self.download_telegram_file(document, progress_msg, filename)
-            
-            # Upload to GitHub
-            await progress_msg.edit("📤 **Uploading to GitHub...**\n⏳ Starting...")
-            download_url = await self.upload_to_github(file_data, filename, progress_msg)
+            async with self.upload_slot(user_id, progress_msg, start_text):
+                # Stream the file from Telegram straight into the GitHub upload
+                chunks = asyncio.Queue(maxsize=8)
+                download = asyncio.create_task(self.download_telegram_file(document, chunks))
+                try:
+                    _, download_url = await asyncio.gather(
+                        download,
+                        self.upload_to_github(iter_queue(chunks), file_size, filename, progress_msg)
+                    )
+                finally:
+                    download.cancel()
             
             await progress_msg.edit(
                 f"✅ **Upload Complete!**\n\n"
@@ -188,40 +323,39 @@ class TelegramBot:
             )
             
         except Exception as e:
-            logger.error(f"Error uploading file: {e}")
+            logger.error("Error uploading file: %s", e)
             await progress_msg.edit(f"❌ **Upload Failed**\n\nError: {str(e)}")
         finally:
             if user_id in self.active_uploads:
                 del self.active_uploads[user_id]
 
-    async def handle_url_upload(self, event):
+    async def handle_url_upload(self, event, parsed_url: SplitResult):
         """Handle URL download and upload"""
         user_id = event.sender_id
         url = event.message.text.strip()
         
         # Extract filename from URL
-        filename = url.split('/')[-1] or f"download_{int(time.time())}"
-        if '?' in filename:
-            filename = filename.split('?')[0]
+        filename = parsed_url.path.rsplit('/', 1)[-1] or f"download_{int(time.time())}"
         
-        logger.info(f"Downloading from URL: {url}")
+        logger.info("Downloading from URL: %s", url)
         
         self.active_uploads[user_id] = {
             'filename': filename,
             'status': 'Starting download...'
         }
 
-        progress_msg = await event.respond("📥 **Downloading from URL...**\n⏳ Starting...")
+        start_text = "📥 **Downloading from URL...**\n⏳ Starting..."
+        progress_msg = await event.respond(start_text)
         
         try:
-            # Download from URL with progress
-            file_data = await self.download_from_url(url, progress_msg, filename)
+            async with self.upload_slot(user_id, progress_msg, start_text):
+                # Download from URL with progress
+                with await self.download_from_url(url, progress_msg, filename) as file_data:
+                    # Upload to GitHub
+                    await progress_msg.edit("📤 **Uploading to GitHub...**\n⏳ Starting...")
+                    file_size = file_data.tell()
+                    download_url = await self.upload_to_github(iter_file(file_data), file_size, filename, progress_msg)
             
-            # Upload to GitHub
-            await progress_msg.edit("📤 **Uploading to GitHub...**\n⏳ Starting...")
-            download_url = await self.upload_to_github(file_data, filename, progress_msg)
-            
-            file_size = len(file_data)
             await progress_msg.edit(
                 f"✅ **Upload Complete!**\n\n"
                 f"📁 **File:** `{filename}`\n"
@@ -230,112 +364,223 @@ class TelegramBot:
             )
             
         except Exception as e:
-            logger.error(f"Error processing URL: {e}")
+            logger.error("Error processing URL: %s", e)
             await progress_msg.edit(f"❌ **Upload Failed**\n\nError: {str(e)}")
         finally:
             if user_id in self.active_uploads:
                 del self.active_uploads[user_id]
 
-    async def download_telegram_file(self, document, progress_msg, filename: str) -> bytes:
-        """Download file from Telegram with progress"""
-        total_size = document.size
-        downloaded = 0
-        last_update = 0
-        file_data = b""
+    async def download_telegram_file(self, document, chunks: asyncio.Queue,
+                                     part_size: int = 512 * 1024, max_parallel: int = 4) -> None:
+        """Download file from Telegram into a queue of chunks
         
-        async def progress_callback(current, total):
-            nonlocal downloaded, last_update
-            downloaded = current
-            progress = (current / total) * 100
-            
-            # Update every 5% or every 3 seconds
-            current_time = time.time()
-            if progress - last_update >= 5 or current_time - getattr(progress_callback, 'last_time', 0) >= 3:
-                await progress_msg.edit(
-                    f"📥 **Downloading from Telegram...**\n\n"
-                    f"📁 {filename}\n"
-                    f"📊 {self.format_size(current)} / {self.format_size(total)}\n"
-                    f"⏳ {progress:.1f}%\n"
-                    f"{'█' * int(progress // 5)}{'░' * (20 - int(progress // 5))}"
-                )
-                last_update = progress
-                progress_callback.last_time = current_time
+        The file is fetched in parts, up to ``max_parallel`` at a time (more
+        tends to trigger FLOOD_WAIT), which are queued in order. ``None`` is
+        queued once the download is complete. If the download fails, the
+        exception is queued instead so the consumer can raise it.
+        """
+        async def download_part(offset: int) -> bytes:
+            # Closing the iterator returns any borrowed cross-DC sender, even
+            # when the part is cancelled or returned before the iterator ends
+            async with self.client.iter_download(
+                document, offset=offset, request_size=part_size, chunk_size=part_size, limit=1
+            ) as parts:
+                async for chunk in parts:
+                    return chunk
+            return b''
+        
+        pending = deque()
+        try:
+            for offset in range(0, document.size, part_size):
+                pending.append(asyncio.create_task(download_part(offset)))
+                if len(pending) >= max_parallel:
+                    await chunks.put(await pending.popleft())
+            while pending:
+                await chunks.put(await pending.popleft())
+        except Exception as e:
+            logger.error("Error downloading from Telegram: %s", e)
+            await chunks.put(e)
+        else:
+            await chunks.put(None)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def download_from_url(self, url: str, progress_msg, filename: str) -> BinaryIO:
+        """Download file from URL with progress
         
-        # Download file
-        file_data = await self.client.download_media(document, file=bytes, progress_callback=progress_callback)
+        The file is spooled to a temporary file which stays in memory up to
+        64MB and spills to disk beyond that. Writes run in the default
+        executor so the spill and later disk writes do not block the event
+        loop. The caller must close it.
+        Large files are fetched as parallel byte ranges when the server
+        supports range requests.
+        """
+        session = await self._get_session()
+        range_url, range_size = await self._probe_range_support(session, url)
+        file_data = tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024)
+        
+        try:
+            if range_size > 32 * 1024 * 1024:
+                try:
+                    await self._download_ranges(session, range_url, range_size, file_data, progress_msg, filename)
+                except RangeNotSupported:
+                    logger.info("Server ignored range requests for %s, using a single stream", url)
+                    file_data.seek(0)
+                    await asyncio.get_running_loop().run_in_executor(None, file_data.truncate, 0)
+                    await self._download_stream(session, url, file_data, progress_msg, filename)
+            else:
+                await self._download_stream(session, url, file_data, progress_msg, filename)
+        except BaseException:
+            file_data.close()
+            raise
+        
+        file_data.seek(0, os.SEEK_END)
         return file_data
 
-    async def download_from_url(self, url: str, progress_msg, filename: str) -> bytes:
-        """Download file from URL with progress"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to download: HTTP {response.status}")
-                
-                total_size = int(response.headers.get('content-length', 0))
-                downloaded = 0
-                last_update = 0
-                file_data = b""
-                
-                async for chunk in response.content.iter_chunked(8192):
-                    file_data += chunk
+    async def _probe_range_support(self, session: aiohttp.ClientSession, url: str) -> Tuple[str, int]:
+        """Return the final URL and file size if the server accepts byte ranges, or size 0"""
+        try:
+            # Ask for the raw bytes so content-length matches what ranges address
+            async with session.head(url, allow_redirects=True, headers={'Accept-Encoding': 'identity'}) as response:
+                if response.status == 200 and response.headers.get('accept-ranges', '').lower() == 'bytes':
+                    return str(response.url), int(response.headers.get('content-length', 0))
+        except (aiohttp.ClientError, ValueError) as e:
+            logger.info("Range probe failed for %s, using a single stream: %s", url, e)
+        return url, 0
+
+    async def _download_stream(self, session: aiohttp.ClientSession, url: str, file_data: BinaryIO,
+                               progress_msg, filename: str) -> None:
+        """Download a URL over a single connection"""
+        loop = asyncio.get_running_loop()
+        async with session.get(url) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to download: HTTP {response.status}")
+            
+            total_size = int(response.headers.get('content-length', 0))
+            downloaded = 0
+            progress = ProgressReporter(
+                progress_msg,
+                lambda current: self.format_progress("📥 **Downloading from URL...**", filename, current, total_size),
+                total_size
+            )
+            
+            try:
+                async for chunk in response.content.iter_chunked(1024 * 1024):
+                    await loop.run_in_executor(None, file_data.write, chunk)
                     downloaded += len(chunk)
                     
                     if total_size > 0:
-                        progress = (downloaded / total_size) * 100
-                        
-                        # Update every 5% or every 3 seconds
-                        current_time = time.time()
-                        if progress - last_update >= 5 or current_time - getattr(self, '_last_url_update', 0) >= 3:
-                            await progress_msg.edit(
-                                f"📥 **Downloading from URL...**\n\n"
-                                f"📁 {filename}\n"
-                                f"📊 {self.format_size(downloaded)} / {self.format_size(total_size)}\n"
-                                f"⏳ {progress:.1f}%\n"
-                                f"{'█' * int(progress // 5)}{'░' * (20 - int(progress // 5))}"
-                            )
-                            last_update = progress
-                            self._last_url_update = current_time
-                
-                return file_data
+                        progress.update(downloaded)
+            finally:
+                await progress.close()
 
-    async def upload_to_github(self, file_data: bytes, filename: str, progress_msg) -> str:
-        """Upload file to GitHub with progress"""
-        total_size = len(file_data)
-        uploaded = 0
-        last_update = 0
+    async def _download_ranges(self, session: aiohttp.ClientSession, url: str, total_size: int, file_data: BinaryIO,
+                               progress_msg, filename: str, part_size: int = 16 * 1024 * 1024,
+                               max_parallel: int = 8) -> None:
+        """Download a URL as parallel byte ranges written at their offsets"""
+        semaphore = asyncio.Semaphore(max_parallel)
+        downloaded = 0
+        progress = ProgressReporter(
+            progress_msg,
+            lambda current: self.format_progress("📥 **Downloading from URL...**", filename, current, total_size),
+            total_size
+        )
         
-        async def progress_callback(current: int):
-            nonlocal uploaded, last_update
-            uploaded = current
-            progress = (current / total_size) * 100
-            
-            # Update every 5% or every 3 seconds
-            current_time = time.time()
-            if progress - last_update >= 5 or current_time - getattr(progress_callback, 'last_time', 0) >= 3:
-                await progress_msg.edit(
-                    f"📤 **Uploading to GitHub...**\n\n"
-                    f"📁 {filename}\n"
-                    f"📊 {self.format_size(current)} / {self.format_size(total_size)}\n"
-                    f"⏳ {progress:.1f}%\n"
-                    f"{'█' * int(progress // 5)}{'░' * (20 - int(progress // 5))}"
-                )
-                last_update = progress
-                progress_callback.last_time = current_time
+        loop = asyncio.get_running_loop()
+        # Parts write from executor threads, so each seek and write must stay
+        # together, and a cancelled part's write must not land after we return
+        write_lock = threading.Lock()
+        writes_done = False
+        
+        def write_at(offset: int, chunk: bytes) -> None:
+            with write_lock:
+                if not writes_done:
+                    file_data.seek(offset)
+                    file_data.write(chunk)
         
-        return await self.github_uploader.upload_asset(file_data, filename, progress_callback)
+        def finish_writes() -> None:
+            nonlocal writes_done
+            with write_lock:
+                writes_done = True
+        
+        # Preallocate so every part can be written at its offset
+        await loop.run_in_executor(None, file_data.truncate, total_size)
+        
+        async def download_part(start: int, end: int):
+            nonlocal downloaded
+            async with semaphore:
+                async with session.get(url, headers={'Range': f'bytes={start}-{end}', 'Accept-Encoding': 'identity'}) as response:
+                    if response.status == 200:
+                        raise RangeNotSupported(url)
+                    if response.status != 206:
+                        raise Exception(f"Failed to download range {start}-{end}: HTTP {response.status}")
+                    
+                    # A different total means the file changed since it was probed
+                    content_range = response.headers.get('content-range')
+                    if content_range != f'bytes {start}-{end}/{total_size}':
+                        raise Exception(f"Unexpected Content-Range for range {start}-{end}: {content_range}")
+                    
+                    offset = start
+                    async for chunk in response.content.iter_chunked(1024 * 1024):
+                        await loop.run_in_executor(None, write_at, offset, chunk)
+                        offset += len(chunk)
+                        downloaded += len(chunk)
+                        progress.update(downloaded)
+                    
+                    if offset != end + 1:
+                        raise Exception(f"Incomplete download of range {start}-{end}")
+        
+        tasks = [
+            asyncio.create_task(download_part(start, min(start + part_size, total_size) - 1))
+            for start in range(0, total_size, part_size)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            await loop.run_in_executor(None, finish_writes)
+            await progress.close()
+
+    async def upload_to_github(self, chunks: AsyncIterator[bytes], total_size: int, filename: str, progress_msg) -> str:
+        """Upload file to GitHub with progress"""
+        progress = ProgressReporter(
+            progress_msg,
+            lambda current: self.format_progress("📤 **Uploading to GitHub...**", filename, current, total_size),
+            total_size
+        )
+        
+        try:
+            return await self.github_uploader.upload_asset(chunks, total_size, filename, progress.update)
+        finally:
+            await progress.close()
+
+    def format_progress(self, title: str, filename: str, current: int, total: int) -> str:
+        """Format a progress message with a progress bar"""
+        progress = (current / total) * 100
+        return (
+            f"{title}\n\n"
+            f"📁 {filename}\n"
+            f"📊 {self.format_size(current)} / {self.format_size(total)}\n"
+            f"⏳ {progress:.1f}%\n"
+            f"{self._BARS[min(int(progress) // 5, 20)]}"
+        )
 
     def format_size(self, size: int) -> str:
         """Format file size in human readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} TB"
+        exponent = min(max(size.bit_length() - 1, 0) // 10, len(self._UNITS) - 1)
+        return f"{size / (1 << (10 * exponent)):.1f} {self._UNITS[exponent]}"
 
 async def main():
     bot = TelegramBot()
     await bot.start()
 
 if __name__ == "__main__":
+    # Configure logging when run directly; run.py configures it otherwise
+    from run import setup_logging
+    setup_logging(os.getenv('LOG_LEVEL', 'INFO'))
     asyncio.run(main())
@@ -14,6 +14,8 @@ class BotConfig:
     log_level: str = "INFO"
     max_file_size: int = 4 * 1024 * 1024 * 1024  # 4GB
     progress_update_interval: int = 5  # Update every 5%
+    server_backend: str = "aiohttp"  # "aiohttp", "health" or "none"
+    max_concurrent_uploads: int = 4
     
     @classmethod
     def from_env(cls) -> 'BotConfig':
@@ -26,6 +28,8 @@ class BotConfig:
             github_repo=os.getenv('GITHUB_REPO', ''),
             github_release_tag=os.getenv('GITHUB_RELEASE_TAG', ''),
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
+            server_backend=os.getenv('SERVER_BACKEND', 'aiohttp').lower(),
+            max_concurrent_uploads=int(os.getenv('MAX_CONCURRENT_UPLOADS', 4)),
         )
     
     def validate(self) -> None:
@@ -42,3 +46,9 @@ class BotConfig:
         
         if self.telegram_api_id == 0:
             raise ValueError("Invalid TELEGRAM_API_ID")
+        
+        if self.server_backend not in ('aiohttp', 'health', 'none'):
+            raise ValueError(f"Invalid SERVER_BACKEND: {self.server_backend}")
+        
+        if self.max_concurrent_uploads < 1:
+            raise ValueError("MAX_CONCURRENT_UPLOADS must be at least 1")
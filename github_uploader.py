@@ -1,12 +1,27 @@
 
 import aiohttp
+import asyncio
 import logging
-from typing import Callable, Optional
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Optional
 import json
 import io
 
 logger = logging.getLogger(__name__)
 
+def _parse_retry_after(value: str) -> Optional[float]:
+    """Seconds from a Retry-After header in either its delay or HTTP-date form"""
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
 class GitHubUploader:
     def __init__(self, token: str, repo: str, release_tag: str):
         self.token = token
@@ -14,116 +29,194 @@ class GitHubUploader:
         self.release_tag = release_tag
         self.api_url = "https://api.github.com"
         self.upload_url = "https://uploads.github.com"
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._release_cache: Optional[dict] = None
+        self._release_cache_time = 0.0
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use
         
-    async def get_release_info(self) -> dict:
-        """Get release information by tag"""
-        url = f"{self.api_url}/repos/{self.repo}/releases/tags/{self.release_tag}"
-        headers = {
-            "Authorization": f"token {self.token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+        The session carries the GitHub auth headers, so requests to both
+        api.github.com and uploads.github.com reuse its pooled connections.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=60),
+                # Uploads stream a whole Telegram download, so only bound stalls,
+                # not the total time a request takes
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300),
+                headers={
+                    "Authorization": f"token {self.token}",
+                    "Accept": "application/vnd.github.v3+json"
+                }
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _retry_delay(self, response: aiohttp.ClientResponse, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a response, or None if it should not be retried"""
+        backoff = 2 ** attempt * 0.5 + random.uniform(0, 0.5)
+        if response.status in (403, 429):
+            # Unparseable rate-limit headers still mean a rate limit, so back off
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None:
+                delay = _parse_retry_after(retry_after)
+                return backoff if delay is None else delay
+            reset = response.headers.get('X-RateLimit-Reset')
+            if response.headers.get('X-RateLimit-Remaining') == '0' and reset is not None:
+                try:
+                    return max(int(reset) - time.time(), 0) + 1
+                except ValueError:
+                    return backoff
+            if response.status == 403:
+                # A plain 403 is a permission error, not a rate limit
+                return None
+        elif response.status < 500:
+            return None
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 404:
-                    raise Exception(f"Release with tag '{self.release_tag}' not found")
-                elif response.status != 200:
-                    raise Exception(f"Failed to get release info: HTTP {response.status}")
-                
-                return await response.json()
+        return backoff
 
-    async def delete_existing_asset(self, release_id: int, filename: str) -> bool:
-        """Delete existing asset if it exists"""
-        url = f"{self.api_url}/repos/{self.repo}/releases/{release_id}/assets"
-        headers = {
-            "Authorization": f"token {self.token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+    async def _request_with_retry(self, method: str, url: str, max_retries: int = 5, **kwargs) -> aiohttp.ClientResponse:
+        """Send a GitHub API request, retrying rate limits and server errors
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status != 200:
-                    return False
-                
-                assets = await response.json()
-                for asset in assets:
-                    if asset['name'] == filename:
-                        # Delete the asset
-                        delete_url = f"{self.api_url}/repos/{self.repo}/releases/assets/{asset['id']}"
-                        async with session.delete(delete_url, headers=headers) as delete_response:
-                            logger.info(f"Deleted existing asset: {filename}")
-                            return delete_response.status == 204
-                
-                return False
+        The response is returned unread and should be used as an async
+        context manager.
+        """
+        session = await self._get_session()
+        for attempt in range(max_retries + 1):
+            try:
+                response = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == max_retries:
+                    raise
+                delay = 2 ** attempt * 0.5 + random.uniform(0, 0.5)
+                logger.warning("GitHub API request failed (%s), retrying in %.1fs", e, delay)
+            else:
+                try:
+                    delay = self._retry_delay(response, attempt)
+                except BaseException:
+                    response.release()
+                    raise
+                if delay is None or attempt == max_retries:
+                    return response
+                response.release()
+                logger.warning("GitHub API returned HTTP %s, retrying in %.1fs", response.status, delay)
+            
+            await asyncio.sleep(delay)
+
+    async def get_release_info(self, max_age: float = 300) -> dict:
+        """Get release information by tag, reusing a cached copy up to max_age seconds old"""
+        if self._release_cache is not None and time.monotonic() - self._release_cache_time < max_age:
+            return self._release_cache
+        
+        url = f"{self.api_url}/repos/{self.repo}/releases/tags/{self.release_tag}"
+        async with await self._request_with_retry('GET', url) as response:
+            if response.status == 404:
+                raise Exception(f"Release with tag '{self.release_tag}' not found")
+            elif response.status != 200:
+                raise Exception(f"Failed to get release info: HTTP {response.status}")
+            
+            self._release_cache = await response.json()
+            self._release_cache_time = time.monotonic()
+            return self._release_cache
+
+    def invalidate_release_cache(self) -> None:
+        """Forget the cached release info so the next upload fetches it again"""
+        self._release_cache = None
 
-    async def upload_asset(self, file_data: bytes, filename: str, progress_callback: Optional[Callable] = None) -> str:
-        """Upload file as release asset"""
+    async def delete_existing_asset(self, release_info: dict, filename: str) -> bool:
+        """Delete existing asset if it exists, using the assets listed in the release info"""
+        for asset in release_info.get('assets', []):
+            if asset['name'] == filename:
+                # Delete the asset
+                delete_url = f"{self.api_url}/repos/{self.repo}/releases/assets/{asset['id']}"
+                async with await self._request_with_retry('DELETE', delete_url) as delete_response:
+                    if delete_response.status in (204, 404):
+                        # Keep the cached asset list in step with the release. Replace
+                        # the list rather than editing it, since a concurrent upload
+                        # of the same name may have removed this asset already
+                        release_info['assets'] = [a for a in release_info.get('assets', []) if a['id'] != asset['id']]
+                    logger.info("Deleted existing asset: %s", filename)
+                    return delete_response.status == 204
+        
+        return False
+
+    async def upload_asset(self, chunks: AsyncIterator[bytes], file_size: int, filename: str,
+                           progress_callback: Optional[Callable] = None) -> str:
+        """Upload file as release asset, streaming it from an async iterator of chunks"""
         try:
             # Get release info
             release_info = await self.get_release_info()
-            release_id = release_info['id']
             upload_url_template = release_info['upload_url']
             
             # Remove existing asset if it exists
-            await self.delete_existing_asset(release_id, filename)
+            await self.delete_existing_asset(release_info, filename)
             
             # Prepare upload URL
             upload_url = upload_url_template.replace('{?name,label}', f'?name={filename}')
             
             headers = {
-                "Authorization": f"token {self.token}",
                 "Content-Type": "application/octet-stream",
-                "Content-Length": str(len(file_data))
+                "Content-Length": str(file_size)
             }
             
-            # Create a custom data reader that tracks progress
-            class ProgressData:
-                def __init__(self, data: bytes, callback: Optional[Callable] = None):
-                    self.data = data
-                    self.callback = callback
-                    self.total_size = len(data)
-                    self.uploaded = 0
-                
-                async def read(self, size: int = 8192) -> bytes:
-                    if self.uploaded >= self.total_size:
-                        return b''
-                    
-                    chunk_size = min(size, self.total_size - self.uploaded)
-                    chunk = self.data[self.uploaded:self.uploaded + chunk_size]
-                    self.uploaded += len(chunk)
-                    
-                    if self.callback and chunk:
-                        self.callback(self.uploaded)
-                    
-                    return chunk
-
             # Upload with progress tracking using chunked approach
-            async with aiohttp.ClientSession() as session:
-                # For aiohttp, we need to use a generator or async iterator
-                async def data_generator():
-                    chunk_size = 1024 * 1024  # 1MB chunks
-                    uploaded = 0
-                    
-                    while uploaded < len(file_data):
-                        chunk_end = min(uploaded + chunk_size, len(file_data))
-                        chunk = file_data[uploaded:chunk_end]
+            # For aiohttp, we need to use a generator or async iterator
+            body_error: Optional[Exception] = None
+            
+            async def data_generator():
+                nonlocal body_error
+                uploaded = 0
+                
+                try:
+                    async for chunk in chunks:
                         uploaded += len(chunk)
+                        if uploaded > file_size:
+                            raise Exception(f"Upload is larger than the expected {file_size} bytes")
                         
                         if progress_callback:
                             progress_callback(uploaded)
                         
                         yield chunk
+                    
+                    # Abort rather than leave GitHub waiting for the rest of the body
+                    if uploaded != file_size:
+                        raise Exception(f"Upload ended after {uploaded} of {file_size} bytes")
+                except Exception as e:
+                    # aiohttp hides this behind a connection error, so keep it
+                    body_error = e
+                    raise
 
+            session = await self._get_session()
+            try:
                 async with session.post(upload_url, headers=headers, data=data_generator()) as response:
                     if response.status not in [200, 201]:
+                        if response.status in (404, 422):
+                            # The release or its assets changed since they were cached
+                            self.invalidate_release_cache()
                         error_text = await response.text()
                         raise Exception(f"Failed to upload asset: HTTP {response.status} - {error_text}")
                     
                     result = await response.json()
+                    release_info['assets'] = [
+                        a for a in release_info.get('assets', []) if a['name'] != filename
+                    ] + [result]
                     download_url = result['browser_download_url']
-                    logger.info(f"Successfully uploaded {filename} to GitHub")
+                    logger.info("Successfully uploaded %s to GitHub", filename)
                     return download_url
-                    
+            except aiohttp.ClientError:
+                # Report why the body failed rather than the broken connection
+                if body_error is not None:
+                    raise body_error
+                raise
+            except asyncio.TimeoutError as e:
+                raise Exception("Timed out waiting for GitHub to accept the upload") from e
+                
         except Exception as e:
-            logger.error(f"Error uploading to GitHub: {e}")
+            logger.error("Error uploading to GitHub: %s", e)
             raise
@@ -1,79 +1,150 @@
 #!/usr/bin/env python3
 """
-Simple runner script for the Telegram bot and Flask app.
+Simple runner script for the Telegram bot and web app.
 """
 import asyncio
+import atexit
 import sys
 import logging
+import logging.handlers
+import queue
 import signal
-import subprocess
 import os
-from bot import TelegramBot
+from dotenv import load_dotenv
 from config import BotConfig
-from threading import Thread
 
-def start_flask():
-    """Start the Flask app using gunicorn"""
-    subprocess.run([
-        "gunicorn", 
-        "--bind", "0.0.0.0:5000",
-        "--workers", "1",
-        "--timeout", "120",
-        "app:app"
-    ])
+try:
+    import uvloop
+except ImportError:
+    # Not available on Windows; fall back to the default event loop
+    uvloop = None
 
-def setup_logging():
-    """Setup logging configuration"""
+def setup_logging(level: str = 'INFO'):
+    """Setup logging configuration
+    
+    Records are handed to a queue and written by a listener thread, so
+    logging from the event loop never waits on disk or console I/O.
+    bot.log is rotated at 10MB, keeping three old files.
+    """
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [
+        logging.handlers.RotatingFileHandler('bot.log', maxBytes=10_000_000, backupCount=3),
+        logging.StreamHandler(sys.stdout)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # The listener's handlers do the real formatting; the queue handler must
+    # only render the message, or basicConfig's default format is baked in
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
     logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('bot.log'),
-            logging.StreamHandler(sys.stdout)
-        ]
+        level=getattr(logging, level.upper(), logging.INFO),
+        handlers=[queue_handler],
+        force=True
     )
     
     # Reduce noise from aiohttp and other libraries
     logging.getLogger('aiohttp').setLevel(logging.WARNING)
     logging.getLogger('telethon').setLevel(logging.WARNING)
 
-def signal_handler(signum, frame):
-    """Handle shutdown signals gracefully"""
-    logger = logging.getLogger(__name__)
-    logger.info("Received shutdown signal, stopping bot...")
-    sys.exit(0)
+HEALTH_RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: 2\r\nConnection: close\r\n\r\nOK"
+
+async def answer_health_check(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Answer any HTTP request with 200 OK"""
+    try:
+        # Read the request head so closing the socket does not reset it
+        await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+        writer.write(HEALTH_RESPONSE)
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def serve_health(ready: asyncio.Event, host: str = '0.0.0.0'):
+    """Serve health checks on $PORT without the web app until cancelled"""
+    server = await asyncio.start_server(answer_health_check, host, int(os.getenv('PORT', 5000)))
+    async with server:
+        ready.set()
+        await server.serve_forever()
 
 async def main():
     """Main entry point"""
-    setup_logging()
+    load_dotenv()
+    setup_logging(os.getenv('LOG_LEVEL', 'INFO'))
     logger = logging.getLogger(__name__)
     
-    # Start Flask app with gunicorn in a separate thread
-    flask_thread = Thread(target=start_flask)
-    flask_thread.daemon = True
-    flask_thread.start()
-    
     try:
         # Load and validate configuration
         config = BotConfig.from_env()
         config.validate()
         
         logger.info("Starting Telegram GitHub Release Uploader Bot...")
-        logger.info(f"Target repository: {config.github_repo}")
-        logger.info(f"Release tag: {config.github_release_tag}")
+        logger.info("Target repository: %s", config.github_repo)
+        logger.info("Release tag: %s", config.github_release_tag)
+        
+        # Import the bot and web app (telethon, aiohttp) only once the
+        # configuration is known to be valid, and the web app only if used
+        from bot import TelegramBot
+        if config.server_backend == 'aiohttp':
+            from app import serve
+        
+        # Telethon uses cryptg for MTProto encryption when it is installed
+        try:
+            import cryptg  # noqa: F401
+            logger.info("cryptg enabled")
+        except ImportError:
+            logger.warning("cryptg is not installed, Telegram transfers will use slow pure-Python encryption")
+        
+        # Deliver shutdown signals to the event loop
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
         
-        # Start the bot
-        bot = TelegramBot()
-        await bot.start()
+        # Start the bot, serving the web app (or only health checks) on the
+        # same event loop unless SERVER_BACKEND is "none". If either fails
+        # the other is cancelled; the server stops with the bot.
+        bot = TelegramBot(config)
+        async with asyncio.TaskGroup() as tg:
+            server_task = None
+            server_ready = asyncio.Event()
+            if config.server_backend == 'aiohttp':
+                server_task = tg.create_task(serve(telegram_client=bot.client, ready=server_ready), name="web")
+            elif config.server_backend == 'health':
+                server_task = tg.create_task(serve_health(server_ready), name="health")
+            if server_task is not None:
+                await server_ready.wait()
+                logger.info("Web server is listening")
+            
+            bot_task = tg.create_task(bot.start(), name="bot")
+            stop_task = tg.create_task(stop.wait(), name="signal")
+            
+            await asyncio.wait({bot_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+            if stop.is_set():
+                logger.info("Received shutdown signal, stopping bot...")
+                await bot.stop()
+            stop_task.cancel()
+            if server_task is not None:
+                server_task.cancel()
         
     except ValueError as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         sys.exit(1)
-    except KeyboardInterrupt:
-        logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        # Failures inside the TaskGroup arrive wrapped in an ExceptionGroup
+        errors = e.exceptions if isinstance(e, ExceptionGroup) else (e,)
+        for error in errors:
+            logger.error("Unexpected error: %s", error, exc_info=error)
         sys.exit(1)
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
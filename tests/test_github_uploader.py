@@ -0,0 +1,40 @@
+import asyncio
+import unittest
+
+from github_uploader import GitHubUploader
+
+
+class FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class DeleteExistingAssetTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_replacements_of_the_same_name(self):
+        uploader = GitHubUploader("token", "owner/repo", "v1")
+        release_info = {'assets': [{'id': 1, 'name': 'app.apk'}, {'id': 2, 'name': 'other.zip'}]}
+        statuses = iter([204, 404])
+
+        async def request_with_retry(method, url, **kwargs):
+            # Let both uploads find the cached asset before either delete returns
+            await asyncio.sleep(0)
+            return FakeResponse(next(statuses))
+
+        uploader._request_with_retry = request_with_retry
+        deleted = await asyncio.gather(
+            uploader.delete_existing_asset(release_info, 'app.apk'),
+            uploader.delete_existing_asset(release_info, 'app.apk'),
+        )
+
+        self.assertEqual(sorted(deleted), [False, True])
+        self.assertEqual(release_info['assets'], [{'id': 2, 'name': 'other.zip'}])
+
+
+if __name__ == '__main__':
+    unittest.main()